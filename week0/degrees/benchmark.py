@@ -0,0 +1,139 @@
+"""
+Benchmarks degrees.py on a dataset directory: load time, peak resident
+memory, and per-query latency percentiles of each search strategy.
+
+Every load mode runs in its own subprocess, so that peak memory is
+measured for that mode alone. Peak memory is taken right after loading.
+
+Usage: python benchmark.py directory [--queries N] [--seed N]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import degrees
+import snapshot
+
+MODES = {
+    "dict": {},
+    "compact": {"compact": True},
+    "cache": {"cache": True},
+}
+
+
+def peak_rss_mb():
+    """Returns this process's peak resident set size in MiB, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def percentiles(samples):
+    """Returns p50/p90/p99/max of `samples` (in seconds) as milliseconds."""
+    samples = sorted(samples)
+
+    def at(q):
+        return 1000 * samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    return {"p50": at(0.50), "p90": at(0.90), "p99": at(0.99),
+            "max": 1000 * samples[-1]}
+
+
+def time_queries(strategy, pairs):
+    """
+    Runs `strategy` on each pair and returns the latency percentiles.
+    The path cache is emptied before each query, so every sample times
+    a search rather than a cache hit.
+    """
+    samples = []
+    for source, target in pairs:
+        degrees.path_cache.clear()
+        start = time.perf_counter()
+        strategy(source, target)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run_mode(directory, mode, n_queries, seed):
+    """Loads `directory` in one mode and returns its measurements."""
+    report = {"mode": mode}
+    if mode == "cache":
+        report["mode"] += " (warm)" if snapshot.is_fresh(directory) else " (cold)"
+
+    start = time.perf_counter()
+    degrees.load_data(directory, **MODES[mode])
+    report["load_s"] = time.perf_counter() - start
+    report["rss_mb"] = peak_rss_mb()
+
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    pairs = [tuple(rng.sample(person_ids, 2)) for _ in range(n_queries)]
+
+    strategies = {
+        "bfs": degrees.shortest_path,
+        "bidirectional": lambda source, target: degrees.shortest_path(
+            source, target, bidirectional=True),
+    }
+    report["queries"] = {
+        name: time_queries(strategy, pairs)
+        for name, strategy in strategies.items()
+    }
+
+    start = time.perf_counter()
+    degrees.build_landmarks()
+    report["landmarks_s"] = time.perf_counter() - start
+    report["queries"]["landmarks"] = time_queries(
+        degrees.degrees_of_separation, pairs)
+    return report
+
+
+def print_report(report):
+    rss = report["rss_mb"]
+    print(f"{report['mode']}: load {report['load_s']:.2f}s, "
+          f"peak RSS {'?' if rss is None else f'{rss:.0f} MiB'}, "
+          f"landmarks built in {report['landmarks_s']:.2f}s")
+    for name, latency in report["queries"].items():
+        print(f"    {name:<14}" + "  ".join(
+            f"{key} {value:8.2f}ms" for key, value in latency.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark degrees.py load modes and search strategies.")
+    parser.add_argument("directory")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=MODES,
+                        help="run a single mode in this process, print JSON")
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        print(json.dumps(run_mode(args.directory, args.mode,
+                                  args.queries, args.seed)))
+        return
+
+    # The cache mode runs twice, to time both writing and reading the snapshot
+    for mode in list(MODES) + ["cache"]:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), args.directory,
+             "--mode", mode, "--queries", str(args.queries),
+             "--seed", str(args.seed)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        print_report(json.loads(output.splitlines()[-1]))
+
+
+if __name__ == "__main__":
+    main()
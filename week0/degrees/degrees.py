@@ -1,7 +1,17 @@
+import argparse
 import csv
+import json
+import multiprocessing
 import sys
+from bisect import insort
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from graph import Graph
+from landmarks import LandmarkIndex
+from name_index import NameIndex
+from util import Node, StackFrontier, QueueFrontier, DisjointSet, PathCache
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,10 +22,58 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
-def load_data(directory):
+# Compact CSR co-star index, built by load_data(directory, compact=True)
+graph = None
+
+# Maps person_ids to the id of their connected component
+components = {}
+
+# Component ids joined by incremental updates since loading
+merged_components = DisjointSet()
+
+# Recent shortest_path results, kept valid across incremental updates
+path_cache = PathCache()
+
+# Sorted name index for prefix and fuzzy lookup, built by load_data
+name_index = None
+
+# Landmark distance oracle, built by build_landmarks()
+landmarks = None
+
+def load_data(directory, compact=False, cache=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, the person-movie links are stored only in the
+    integer-indexed `graph` instead of the `movies`/`stars` sets.
+
+    If `cache` is true, the compact data is read from a binary snapshot
+    next to the CSVs when one matches them, and written there otherwise.
     """
+    global graph, name_index, merged_components, landmarks
+
+    # Drop the indexes of any earlier load, which would describe old data
+    graph = None
+    landmarks = None
+    names.clear()
+    people.clear()
+    movies.clear()
+    components.clear()
+    path_cache.clear()
+    merged_components = DisjointSet()
+
+    if cache:
+        compact = True
+        cached = snapshot.load(directory)
+        if cached is not None:
+            names.update(cached[0])
+            people.update(cached[1])
+            movies.update(cached[2])
+            components.update(cached[3])
+            graph = cached[4]
+            name_index = NameIndex(names)
+            return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -23,8 +81,9 @@ def load_data(directory):
             people[row["id"]] = {
                 "name": row["name"],
                 "birth": row["birth"],
-                "movies": set()
             }
+            if not compact:
+                people[row["id"]]["movies"] = set()
             if row["name"].lower() not in names:
                 names[row["name"].lower()] = {row["id"]}
             else:
@@ -37,29 +96,83 @@ def load_data(directory):
             movies[row["id"]] = {
                 "title": row["title"],
                 "year": row["year"],
-                "stars": set()
             }
+            if not compact:
+                movies[row["id"]]["stars"] = set()
+
+    # Load stars, joining each person to the first person seen in the
+    # same movie so that connected people end up in one set
+    sets = DisjointSet()
+    first_star = {}
+
+    def linked(rows):
+        for row in rows:
+            person_id, movie_id = row["person_id"], row["movie_id"]
+            if person_id in people and movie_id in movies:
+                sets.union(person_id, first_star.setdefault(movie_id, person_id))
+                yield person_id, movie_id
 
-    # Load stars
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+        if compact:
+            graph = Graph(people, movies, linked(reader))
+        else:
+            for person_id, movie_id in linked(reader):
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
+
+    # Number the components
+    labels = {}
+    for person_id in people:
+        root = sets.find(person_id)
+        components[person_id] = labels.setdefault(root, len(labels))
+
+    name_index = NameIndex(names)
+
+    if cache:
+        snapshot.save(directory, names, people, movies, components, graph)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two actors.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="keep links only in the compact CSR index")
+    parser.add_argument("--cache", action="store_true",
+                        help="load from (or write) a binary snapshot")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", metavar="FILE", nargs="?", const="-",
+                      help="answer source,target pairs from FILE "
+                           "(default stdin) as JSON lines")
+    mode.add_argument("--serve", metavar="PORT", type=int,
+                      help="answer queries over HTTP on localhost:PORT")
+    parser.add_argument("--workers", metavar="N", type=int, default=1,
+                        help="worker processes for --batch")
+    parser.add_argument("--ambiguous", choices=["error", "most-connected"],
+                        default="error",
+                        help="how --batch and --serve resolve shared names")
+    args = parser.parse_args()
+
+    # Keep stdout clean for JSON output in the non-interactive modes
+    log = sys.stdout if args.batch is None and args.serve is None else sys.stderr
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    load_data(args.directory, compact=args.compact, cache=args.cache)
+    print("Data loaded.", file=log)
+
+    if args.batch == "-":
+        run_batch(sys.stdin, sys.stdout, args.workers, args.ambiguous)
+        return
+    if args.batch is not None:
+        with open(args.batch, encoding="utf-8") as f:
+            run_batch(f, sys.stdout, args.workers, args.ambiguous)
+        return
+    if args.serve is not None:
+        print(f"Serving on http://127.0.0.1:{args.serve}/path", file=log)
+        serve(args.serve, policy=args.ambiguous)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -68,7 +181,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -83,15 +196,177 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
+def resolve_person(value, policy="error"):
+    """
+    Returns the person_id for `value`, which may be either a person_id
+    or a name. Never prompts; raises LookupError if `value` matches no
+    person, or more than one under the "error" policy. The
+    "most-connected" policy picks the namesake with the most movies.
+    """
+    if value in people:
+        return value
+    person_ids = names.get(value.lower(), set())
+    if len(person_ids) == 0:
+        raise LookupError("Person not found.")
+    if len(person_ids) > 1:
+        if policy == "most-connected":
+            return max(sorted(person_ids), key=movie_count)
+        raise LookupError("Ambiguous name.")
+    return next(iter(person_ids))
+
+
+def movie_count(person_id):
+    """Returns the number of movies a person starred in."""
+    if graph is not None:
+        return len(graph.movies_of(graph.person_index[person_id]))
+    return len(people[person_id]["movies"])
+
+
+def query(source, target, policy="error"):
+    """
+    Answers one (source, target) query as a JSON-serializable dict
+    holding either the path and its degrees, or an error message.
+    Ambiguous names are resolved by `policy`, as in resolve_person.
+    """
+    answer = {"source": source, "target": target}
+    try:
+        source_id = resolve_person(source, policy)
+        target_id = resolve_person(target, policy)
+    except LookupError as e:
+        answer["error"] = str(e)
+        return answer
+
+    _add_path(answer, shortest_path(source_id, target_id, bidirectional=True))
+    return answer
+
+
+def _add_path(answer, path):
+    """Records `path` (or its absence) in a query answer."""
+    if path is None:
+        answer["error"] = "Not connected."
+    else:
+        answer["degrees"] = len(path)
+        answer["path"] = [list(step) for step in path]
+
+
+def run_batch(lines, out, workers=1, policy="error"):
+    """
+    Reads `source,target` CSV rows from `lines` and writes one JSON
+    result per row to `out` as it is answered.
+
+    With more than one worker, all rows are read first and answered by
+    parallel_shortest_paths, so results are written in completion order.
+    """
+    pending = {}
+    for row in csv.reader(lines):
+        if not row:
+            continue
+        if len(row) != 2:
+            answer = {"row": row, "error": "Expected source,target."}
+        elif workers > 1:
+            answer = {"source": row[0].strip(), "target": row[1].strip()}
+            try:
+                pair = (resolve_person(answer["source"], policy),
+                        resolve_person(answer["target"], policy))
+            except LookupError as e:
+                answer["error"] = str(e)
+            else:
+                pending.setdefault(pair, []).append(answer)
+                continue
+        else:
+            answer = query(row[0].strip(), row[1].strip(), policy)
+        out.write(json.dumps(answer) + "\n")
+        out.flush()
+
+    for source, target, path in parallel_shortest_paths(pending, workers):
+        for answer in pending[(source, target)]:
+            _add_path(answer, path)
+            out.write(json.dumps(answer) + "\n")
+        out.flush()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers, as JSON:
+        GET /path?source=...&target=...
+        GET /complete?prefix=...[&limit=10]
+        GET /search?name=...[&distance=1]
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/path":
+                result = query(params["source"], params["target"],
+                               self.server.policy)
+            elif url.path == "/complete":
+                result = name_index.complete(
+                    params["prefix"], int(params.get("limit", 10)))
+            elif url.path == "/search":
+                result = name_index.search(
+                    params["name"], int(params.get("distance", 1)))
+            else:
+                self.send_error(404)
+                return
+        except (KeyError, ValueError):
+            self.send_error(400, "missing or invalid parameters")
+            return
+
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host="127.0.0.1", policy="error"):
+    """
+    Answers queries against the loaded data over HTTP until interrupted,
+    one thread per request. Searches only read the shared data.
+    """
+    with ThreadingHTTPServer((host, port), QueryHandler) as server:
+        server.policy = policy
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
 # source and target are already in the id form
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is true, searches from both ends at once
+    and meets in the middle.
+
     If no possible path, returns None.
     """
-    
+    hit, path = path_cache.get((source, target))
+    if not hit:
+        path = _search(source, target, bidirectional)
+        # The cache keeps a tuple, so callers cannot change its entries
+        if path is not None:
+            path = tuple(path)
+        path_cache.put((source, target), path)
+    return None if path is None else list(path)
+
+
+def _search(source, target, bidirectional):
+    """Runs the search behind shortest_path, bypassing the cache."""
+    if components and component_of(source) != component_of(target):
+        return None
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
     # BFS
     queue = QueueFrontier()
     queue.add(Node(source, None, None))
@@ -116,7 +391,310 @@ def shortest_path(source, target):
                 queue.add(Node(neighbour_id, node, movie_id))
     
     return None
-    
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the same path as `shortest_path`, found by growing one BFS
+    frontier from the source and one from the target, always expanding
+    the smaller frontier by one whole level, until they touch.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person_id to the (movie_id, person_id) step
+    # leading back towards the side's starting person, and its depth
+    parents = ({source: None}, {target: None})
+    depths = ({source: 0}, {target: 0})
+    frontiers = ([source], [target])
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        other = 1 - side
+        best = None
+        next_frontier = []
+
+        for person_id in frontiers[side]:
+            depth = depths[side][person_id] + 1
+            for movie_id, neighbour_id in neighbors_for_person(person_id):
+                if neighbour_id in depths[side]:
+                    continue
+                parents[side][neighbour_id] = (movie_id, person_id)
+                depths[side][neighbour_id] = depth
+                next_frontier.append(neighbour_id)
+                if neighbour_id in depths[other]:
+                    length = depth + depths[other][neighbour_id]
+                    if best is None or length < best[0]:
+                        best = (length, neighbour_id)
+
+        if best is not None:
+            return _join_paths(parents[0], parents[1], best[1])
+        frontiers = ((next_frontier, frontiers[1]) if side == 0
+                     else (frontiers[0], next_frontier))
+
+    return None
+
+
+def _join_paths(source_parents, target_parents, meeting_id):
+    """
+    Builds the (movie_id, person_id) path from the source to the target
+    through `meeting_id`, given the parent maps of both search sides.
+    """
+    output = []
+    person_id = meeting_id
+    while source_parents[person_id] is not None:
+        movie_id, parent_id = source_parents[person_id]
+        output.append((movie_id, person_id))
+        person_id = parent_id
+    output.reverse()
+
+    person_id = meeting_id
+    while target_parents[person_id] is not None:
+        movie_id, person_id = target_parents[person_id]
+        output.append((movie_id, person_id))
+    return output
+
+
+def shortest_paths(source, targets):
+    """
+    Returns a dict mapping each of `targets` to its shortest list of
+    (movie_id, person_id) pairs from the source, or None if not connected,
+    all read from a single BFS tree rooted at the source.
+    """
+    paths = {}
+    targets = set(targets)
+    if components:
+        for target in list(targets):
+            if component_of(target) != component_of(source):
+                paths[target] = None
+                targets.discard(target)
+    if not targets:
+        return paths
+    if graph is not None:
+        paths.update(graph.shortest_paths(source, targets))
+        return paths
+
+    # Maps each reached person_id to the (movie_id, person_id) step back
+    parents = {source: None}
+    remaining = targets - {source}
+    frontier = [source]
+    while frontier and remaining:
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbour_id in neighbors_for_person(person_id):
+                if neighbour_id not in parents:
+                    parents[neighbour_id] = (movie_id, person_id)
+                    remaining.discard(neighbour_id)
+                    next_frontier.append(neighbour_id)
+        frontier = next_frontier
+
+    for target in targets:
+        # A path whose target side is just the target itself
+        paths[target] = (_join_paths(parents, {target: None}, target)
+                         if target in parents else None)
+    return paths
+
+
+def _paths_from(item):
+    """Pool task: answers every target of one source."""
+    source, targets = item
+    return source, shortest_paths(source, targets)
+
+
+def parallel_shortest_paths(pairs, processes=None):
+    """
+    Yields (source, target, path) for every (source, target) pair of
+    person_ids, in completion order.
+
+    Pairs are grouped by source so one BFS tree answers all of a source's
+    targets, and sources are spread over a pool of forked processes that
+    inherit the loaded data rather than receiving a pickled copy per task.
+    """
+    by_source = {}
+    for source, target in pairs:
+        by_source.setdefault(source, set()).add(target)
+
+    try:
+        context = multiprocessing.get_context("fork")
+    except ValueError:
+        context = None
+    if context is None or processes == 1:
+        results = map(_paths_from, by_source.items())
+        for source, paths in results:
+            for target, path in paths.items():
+                yield source, target, path
+        return
+
+    with context.Pool(processes) as pool:
+        results = pool.imap_unordered(_paths_from, by_source.items(),
+                                      chunksize=16)
+        for source, paths in results:
+            for target, path in paths.items():
+                yield source, target, path
+
+
+def component_of(person_id):
+    """Returns the id of the connected component a person belongs to."""
+    label = components[person_id]
+    if label in merged_components:
+        return merged_components.find(label)
+    return label
+
+
+def add_person(person_id, name, birth=""):
+    """
+    Inserts a new person, with no movies yet, into the loaded data.
+    For a person already loaded only the name and birth are updated,
+    as feeds resend rows; their links are left as they are.
+    """
+    global landmarks
+    if person_id in people:
+        old_name = people[person_id]["name"].lower()
+        if old_name != name.lower():
+            names[old_name].discard(person_id)
+            if not names[old_name]:
+                del names[old_name]
+                name_index.keys.remove(old_name)
+            _add_name(person_id, name)
+        people[person_id]["name"] = name
+        people[person_id]["birth"] = birth
+        return
+
+    people[person_id] = {"name": name, "birth": birth}
+    if graph is None:
+        people[person_id]["movies"] = set()
+    else:
+        graph.add_person(person_id)
+    _add_name(person_id, name)
+    # Labels given at load time are all below the number of people then
+    components[person_id] = len(components)
+    landmarks = None
+
+
+def _add_name(person_id, name):
+    """Indexes a person under a name."""
+    if name.lower() not in names:
+        names[name.lower()] = {person_id}
+        insort(name_index.keys, name.lower())
+    else:
+        names[name.lower()].add(person_id)
+
+
+def add_movie(movie_id, title, year=""):
+    """
+    Inserts a new movie, with no stars yet, into the loaded data.
+    For a movie already loaded only the title and year are updated.
+    """
+    if movie_id in movies:
+        movies[movie_id]["title"] = title
+        movies[movie_id]["year"] = year
+        return
+    movies[movie_id] = {"title": title, "year": year}
+    if graph is None:
+        movies[movie_id]["stars"] = set()
+    else:
+        graph.add_movie(movie_id)
+
+
+def add_star(person_id, movie_id):
+    """
+    Links a loaded person to a loaded movie, dropping the cached paths
+    this link could shorten. Landmark distances are discarded, as the
+    new link can invalidate their lower bounds; call build_landmarks()
+    again to restore them.
+    """
+    global landmarks
+    cast = (set(movies[movie_id]["stars"]) if graph is None
+            else {graph.person_ids[q]
+                  for q in graph.stars_of(graph.movie_index[movie_id])})
+    if person_id in cast:
+        return
+    _invalidate_paths(person_id, cast)
+
+    if graph is None:
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+    else:
+        graph.add_star(person_id, movie_id)
+    if cast:
+        merged_components.union(component_of(person_id),
+                                component_of(next(iter(cast))))
+    landmarks = None
+
+
+def _invalidate_paths(person_id, cast):
+    """
+    Drops cached results that linking `person_id` to the people in `cast`
+    could change, before the link is made.
+
+    Any new path passes through the new link, so it is at least
+    e(source) + 1 + e(target) long, where e is the distance to the nearest
+    of the link's endpoints. Cached paths shorter than that bound stay.
+    Unconnected results are dropped only if the link joins their
+    components.
+    """
+    if not cast:
+        return
+    endpoints = cast | {person_id}
+    joined = {component_of(person_id), component_of(next(iter(cast)))}
+    longest = max((len(result) for result in path_cache.entries.values()
+                   if result is not None), default=0)
+
+    # Multi-source BFS from the endpoints, as deep as can matter
+    distance = {endpoint: 0 for endpoint in endpoints}
+    frontier = list(endpoints)
+    for depth in range(1, longest - 1):
+        next_frontier = []
+        for p in frontier:
+            for _, q in neighbors_for_person(p):
+                if q not in distance:
+                    distance[q] = depth
+                    next_frontier.append(q)
+        frontier = next_frontier
+
+    def stale(key, result):
+        source, target = key
+        if result is None:
+            return (component_of(source) in joined
+                    and component_of(target) in joined)
+        if source not in distance or target not in distance:
+            return False
+        return distance[source] + 1 + distance[target] < len(result)
+
+    path_cache.invalidate(stale)
+
+
+def build_landmarks(k=16):
+    """
+    Precomputes BFS distances from the `k` highest-degree people,
+    so degrees_of_separation can usually answer without searching.
+    """
+    global landmarks
+    index = graph
+    if index is None:
+        index = Graph(people, movies, (
+            (person_id, movie_id)
+            for person_id in people
+            for movie_id in people[person_id]["movies"]
+        ))
+    landmarks = LandmarkIndex(index, k)
+
+
+def degrees_of_separation(source, target):
+    """
+    Returns the number of degrees of separation between the source
+    and the target, or None if they are not connected.
+    """
+    if landmarks is not None:
+        return landmarks.distance(
+            source, target,
+            lambda source, target: shortest_path(source, target, bidirectional=True))
+    path = shortest_path(source, target, bidirectional=True)
+    return None if path is None else len(path)
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -153,6 +731,8 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
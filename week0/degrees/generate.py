@@ -0,0 +1,107 @@
+"""
+Generates a synthetic IMDB-like dataset in the people.csv / movies.csv /
+stars.csv format read by degrees.load_data.
+
+Cast sizes follow a Pareto (power-law) distribution, and cast members are
+drawn with a skew towards low person ids, so a few people star in very
+many movies while most star in one or two, as in the real data.
+
+Usage: python generate.py directory [--people N] [--movies N] [--seed N]
+"""
+
+import argparse
+import csv
+import os
+import random
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Daniel",
+    "Nancy", "Matthew", "Lisa", "Anthony", "Betty", "Mark", "Margaret",
+    "Emma", "Tom", "Kevin", "Sally", "Gary", "Demi", "Jack", "Valeria",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez",
+    "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark",
+    "Ramirez", "Lewis", "Robinson", "Walker", "Young", "Allen", "King",
+    "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores", "Green",
+]
+WORDS = [
+    "Night", "Return", "Last", "City", "Love", "Dark", "Star", "Secret",
+    "River", "Summer", "War", "Dream", "House", "Road", "Blue", "King",
+    "Shadow", "Fire", "Heart", "Island", "Stranger", "Silent", "Golden",
+]
+
+
+def generate(directory, n_people, n_movies, seed=0,
+             min_cast=4, cast_shape=1.5, max_cast=300, popularity_skew=2.0):
+    """
+    Writes the three CSVs for `n_people` people and `n_movies` movies
+    into `directory`.
+
+    Cast sizes are Pareto distributed with scale `min_cast` and shape
+    `cast_shape`, capped at `max_cast`. Each cast slot picks person index
+    `n_people * u ** popularity_skew` for uniform `u`, so a higher skew
+    concentrates roles on fewer people.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # IMDB-style numeric ids, spread out rather than consecutive
+    person_ids = rng.sample(range(1, 20 * n_people + 1), n_people)
+    movie_ids = rng.sample(range(1, 20 * n_movies + 1), n_movies)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id in person_ids:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            # Suffix most names so only some of them are shared
+            if rng.random() < 0.9:
+                name += f" {rng.randrange(n_people)}"
+            birth = rng.randint(1900, 2010) if rng.random() < 0.8 else ""
+            writer.writerow([person_id, name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie_id in movie_ids:
+            title = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+            writer.writerow([movie_id, title, rng.randint(1920, 2024)])
+
+    with open(os.path.join(directory, "stars.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id in movie_ids:
+            cast_size = min(max_cast,
+                            int(min_cast * rng.paretovariate(cast_shape)))
+            cast = {int(n_people * rng.random() ** popularity_skew)
+                    for _ in range(cast_size)}
+            for i in cast:
+                writer.writerow([person_ids[i], movie_id])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=10_000)
+    parser.add_argument("--movies", type=int,
+                        help="number of movies (default: people / 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n_movies = args.movies if args.movies is not None else max(1, args.people // 3)
+    generate(args.directory, args.people, n_movies, args.seed)
+    print(f"Wrote {args.people} people and {n_movies} movies "
+          f"to {args.directory}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+from array import array
+
+
+class Graph():
+    """
+    Compact bipartite person-movie graph in CSR (compressed sparse row)
+    form. People and movies are interned to consecutive integers, and the
+    movies of person `p` are `person_movies[person_offsets[p]:person_offsets[p + 1]]`
+    (likewise `movie_people` / `movie_offsets` for the cast of a movie).
+
+    People, movies and stars inserted after the arrays are built are kept
+    in the small `added_movies` / `added_people` adjacency overlays.
+    """
+
+    def __init__(self, person_ids, movie_ids, stars):
+        """
+        Builds the graph from lists of person and movie ids and an iterable
+        of (person_id, movie_id) pairs. Pairs naming an unknown person or
+        movie are skipped.
+        """
+        self.person_ids = list(person_ids)
+        self.movie_ids = list(movie_ids)
+        self.person_index = {
+            person_id: i for i, person_id in enumerate(self.person_ids)
+        }
+        self.movie_index = {
+            movie_id: i for i, movie_id in enumerate(self.movie_ids)
+        }
+
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person_id, movie_id in stars:
+            try:
+                p = self.person_index[person_id]
+                m = self.movie_index[movie_id]
+            except KeyError:
+                continue
+            edge_people.append(p)
+            edge_movies.append(m)
+
+        self.person_offsets, self.person_movies = self._csr(
+            edge_people, edge_movies, len(self.person_ids))
+        self.movie_offsets, self.movie_people = self._csr(
+            edge_movies, edge_people, len(self.movie_ids))
+        self.added_movies = {}
+        self.added_people = {}
+
+    @classmethod
+    def from_arrays(cls, person_ids, movie_ids, person_offsets, person_movies,
+                    movie_offsets, movie_people):
+        """
+        Wraps already built CSR arrays, e.g. memoryviews over a snapshot,
+        without copying them.
+        """
+        graph = cls.__new__(cls)
+        graph.person_ids = list(person_ids)
+        graph.movie_ids = list(movie_ids)
+        graph.person_index = {
+            person_id: i for i, person_id in enumerate(graph.person_ids)
+        }
+        graph.movie_index = {
+            movie_id: i for i, movie_id in enumerate(graph.movie_ids)
+        }
+        graph.person_offsets = person_offsets
+        graph.person_movies = person_movies
+        graph.movie_offsets = movie_offsets
+        graph.movie_people = movie_people
+        graph.added_movies = {}
+        graph.added_people = {}
+        return graph
+
+    @staticmethod
+    def _csr(rows, columns, size):
+        """Counting-sorts (row, column) edges into offset and index arrays."""
+        offsets = array("i", bytes(4 * (size + 1)))
+        for row in rows:
+            offsets[row + 1] += 1
+        for i in range(size):
+            offsets[i + 1] += offsets[i]
+
+        indices = array("i", bytes(4 * len(rows)))
+        cursor = offsets[:-1]
+        for row, column in zip(rows, columns):
+            indices[cursor[row]] = column
+            cursor[row] += 1
+        return offsets, indices
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def movies_of(self, p):
+        """Returns the movie indices of person index `p`."""
+        if p < len(self.person_offsets) - 1:
+            movies = self.person_movies[
+                self.person_offsets[p]:self.person_offsets[p + 1]]
+        else:
+            movies = ()
+        if p in self.added_movies:
+            return [*movies, *self.added_movies[p]]
+        return movies
+
+    def stars_of(self, m):
+        """Returns the person indices starring in movie index `m`."""
+        if m < len(self.movie_offsets) - 1:
+            stars = self.movie_people[
+                self.movie_offsets[m]:self.movie_offsets[m + 1]]
+        else:
+            stars = ()
+        if m in self.added_people:
+            return [*stars, *self.added_people[m]]
+        return stars
+
+    def add_person(self, person_id):
+        """Interns a new person with no movies yet."""
+        self.person_index[person_id] = len(self.person_ids)
+        self.person_ids.append(person_id)
+
+    def add_movie(self, movie_id):
+        """Interns a new movie with no stars yet."""
+        self.movie_index[movie_id] = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+
+    def add_star(self, person_id, movie_id):
+        """
+        Links an already interned person and movie.
+        Returns False if they were already linked.
+        """
+        p = self.person_index[person_id]
+        m = self.movie_index[movie_id]
+        if m in self.movies_of(p):
+            return False
+        self.added_movies.setdefault(p, []).append(m)
+        self.added_people.setdefault(m, []).append(p)
+        return True
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for m in self.movies_of(self.person_index[person_id]):
+            movie_id = self.movie_ids[m]
+            for q in self.stars_of(m):
+                neighbors.add((movie_id, self.person_ids[q]))
+        return neighbors
+
+    def degree(self, p):
+        """Returns the number of cast slots person index `p` shares movies with."""
+        return sum(len(self.stars_of(m)) for m in self.movies_of(p))
+
+    def distances(self, s):
+        """
+        Returns an array of BFS distances from person index `s` to every
+        person index, with -1 for people it is not connected to.
+        """
+        movies_of, stars_of = self.movies_of, self.stars_of
+
+        distance = array("i", [-1]) * len(self.person_ids)
+        seen_movies = bytearray(len(self.movie_ids))
+        distance[s] = 0
+
+        frontier = [s]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for p in frontier:
+                for m in movies_of(p):
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for q in stars_of(m):
+                        if distance[q] == -1:
+                            distance[q] = depth
+                            next_frontier.append(q)
+            frontier = next_frontier
+        return distance
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, by BFS over the index arrays.
+
+        If no possible path, returns None.
+        """
+        return self.shortest_paths(source, [target])[target]
+
+    def shortest_paths(self, source, targets):
+        """
+        Returns a dict mapping each of `targets` to its shortest path from
+        the source (or None), all read from one BFS tree rooted at the source.
+        """
+        s = self.person_index[source]
+        parent, via = self._tree(
+            s, {self.person_index[target] for target in targets} - {s})
+
+        paths = {}
+        for target in targets:
+            t = self.person_index[target]
+            paths[target] = (self._path(parent, via, s, t)
+                             if parent[t] != -1 else None)
+        return paths
+
+    def _tree(self, s, remaining):
+        """
+        Grows a BFS tree from person index `s` until every index in
+        `remaining` is reached or the component is exhausted, and returns
+        its (parent, via) arrays.
+        """
+        movies_of, stars_of = self.movies_of, self.stars_of
+
+        # Parent person and connecting movie of every reached person;
+        # -1 marks people not reached yet
+        parent = array("i", [-1]) * len(self.person_ids)
+        via = array("i", [-1]) * len(self.person_ids)
+        # Each movie's cast only needs to be scanned once
+        seen_movies = bytearray(len(self.movie_ids))
+        parent[s] = s
+        if not remaining:
+            return parent, via
+
+        frontier = [s]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for m in movies_of(p):
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for q in stars_of(m):
+                        if parent[q] != -1:
+                            continue
+                        parent[q] = p
+                        via[q] = m
+                        if q in remaining:
+                            remaining.discard(q)
+                            if not remaining:
+                                return parent, via
+                        next_frontier.append(q)
+            frontier = next_frontier
+
+        return parent, via
+
+    def _path(self, parent, via, s, t):
+        """Walks the parent arrays back from `t` to `s`."""
+        output = []
+        while t != s:
+            output.append((self.movie_ids[via[t]], self.person_ids[t]))
+            t = parent[t]
+        output.reverse()
+        return output
@@ -0,0 +1,70 @@
+import sys
+from bisect import bisect_left
+
+# Sorts after any character that appears in a name
+LAST = chr(sys.maxunicode)
+
+
+class NameIndex():
+    """
+    Sorted index of lowercase names. Every prefix of the sorted list is a
+    contiguous range, so the list doubles as an implicit trie: prefix
+    completion is two binary searches, and fuzzy lookup walks the trie,
+    pruning any branch whose prefix is already too far from the query.
+    """
+
+    def __init__(self, names):
+        self.keys = sorted(names)
+
+    def _range(self, prefix, lo=0, hi=None):
+        """Returns the [lo, hi) range of names starting with `prefix`."""
+        if hi is None:
+            hi = len(self.keys)
+        lo = bisect_left(self.keys, prefix, lo, hi)
+        return lo, bisect_left(self.keys, prefix + LAST, lo, hi)
+
+    def complete(self, prefix, limit=10):
+        """Returns up to `limit` names starting with `prefix`, in order."""
+        lo, hi = self._range(prefix.lower())
+        return self.keys[lo:min(hi, lo + limit)]
+
+    def search(self, name, max_distance=1):
+        """
+        Returns (distance, name) pairs for every name within Levenshtein
+        distance `max_distance` of `name`, closest first.
+        """
+        name = name.lower()
+        results = []
+        self._search(name, "", list(range(len(name) + 1)),
+                     0, len(self.keys), max_distance, results)
+        return sorted(results)
+
+    def _search(self, name, prefix, row, lo, hi, max_distance, results):
+        """
+        Visits the trie node for `prefix`, covering names [lo, hi), where
+        `row` is the edit distance row between `prefix` and each prefix
+        of `name`.
+        """
+        keys = self.keys
+        depth = len(prefix)
+
+        # The prefix itself, if it is a name, sorts first in its range
+        if lo < hi and len(keys[lo]) == depth:
+            if row[-1] <= max_distance:
+                results.append((row[-1], keys[lo]))
+            lo += 1
+
+        while lo < hi:
+            c = keys[lo][depth]
+            child = prefix + c
+            end = bisect_left(keys, child + LAST, lo, hi)
+
+            next_row = [row[0] + 1]
+            for i in range(1, len(name) + 1):
+                next_row.append(min(next_row[i - 1] + 1,
+                                    row[i] + 1,
+                                    row[i - 1] + (name[i - 1] != c)))
+            if min(next_row) <= max_distance:
+                self._search(name, child, next_row, lo, end,
+                             max_distance, results)
+            lo = end
@@ -0,0 +1,183 @@
+"""
+Binary snapshot cache of the data loaded by degrees.load_data.
+
+A snapshot is a single file next to the CSVs laid out as:
+
+    magic | header length | JSON header | CSR arrays | JSON metadata
+
+The header records the size and mtime of each CSV the snapshot was built
+from, so a stale snapshot is ignored, and the byte offset of every array,
+so the arrays can be used in place from a read-only memory map.
+
+The cache is best-effort: a snapshot that cannot be written is skipped,
+and one that cannot be read is treated as missing. It holds only JSON
+and integer arrays, so reading one from an untrusted dataset runs no
+code.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from graph import Graph
+
+MAGIC = b"DEGSNAP3"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+TYPECODE = "i"
+
+
+def path_for(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stats(directory):
+    """Returns the (size, mtime_ns) of each source CSV in `directory`."""
+    stats = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stats[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def save(directory, names, people, movies, components, graph):
+    """
+    Writes a snapshot of the loaded data into `directory`, and returns
+    whether it could. The file is replaced atomically, so readers never
+    see a partial one.
+    """
+    metadata = json.dumps(
+        [{name: sorted(ids) for name, ids in names.items()},
+         people, movies, components, graph.person_ids, graph.movie_ids],
+        separators=(",", ":"),
+    ).encode("utf-8")
+    itemsize = array(TYPECODE).itemsize
+
+    # Lay arrays out after the header, aligned to the item size
+    header = {
+        "sources": source_stats(directory),
+        "typecode": TYPECODE,
+        "itemsize": itemsize,
+        "arrays": {},
+    }
+    sizes = [len(getattr(graph, name)) * itemsize for name in ARRAYS]
+    header_bytes = _encode_header(header, sizes, len(metadata))
+
+    tmp = path_for(directory) + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(header_bytes)
+            for name in ARRAYS:
+                offset, _ = header["arrays"][name]
+                f.write(bytes(offset - f.tell()))
+                f.write(memoryview(getattr(graph, name)).cast("B"))
+            f.write(metadata)
+        os.replace(tmp, path_for(directory))
+    except OSError:
+        # A read-only or full directory just goes without a snapshot
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def _encode_header(header, sizes, metadata_size):
+    """
+    Fills in the array and metadata offsets of `header` and returns the
+    encoded prefix. The offsets depend on the header's own length, so
+    this repeats until the length stops changing.
+    """
+    itemsize = header["itemsize"]
+    header_length = 0
+    while True:
+        offset = len(MAGIC) + 8 + header_length
+        for name, size in zip(ARRAYS, sizes):
+            offset += -offset % itemsize
+            header["arrays"][name] = [offset, size // itemsize]
+            offset += size
+        header["metadata"] = [offset, metadata_size]
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) == header_length:
+            return MAGIC + struct.pack("<Q", len(encoded)) + encoded
+        header_length = len(encoded)
+
+
+def _read_header(f, directory):
+    """Returns the header of snapshot file `f`, or None if it is stale."""
+    if f.read(len(MAGIC)) != MAGIC:
+        return None
+    header_length, = struct.unpack("<Q", f.read(8))
+    header = json.loads(f.read(header_length))
+    if (header["sources"] != source_stats(directory)
+            or header["typecode"] != TYPECODE
+            or header["itemsize"] != array(TYPECODE).itemsize):
+        return None
+    return header
+
+
+def is_fresh(directory):
+    """Returns whether `directory` has a snapshot matching its CSVs."""
+    try:
+        with open(path_for(directory), "rb") as f:
+            return _read_header(f, directory) is not None
+    except (OSError, ValueError, OverflowError, struct.error):
+        return False
+
+
+def load(directory):
+    """
+    Returns (names, people, movies, components, graph) from the snapshot
+    in `directory`, with the graph arrays memory-mapped from the file.
+
+    Returns None if there is no snapshot, it does not match the CSVs,
+    or it cannot be decoded.
+    """
+    try:
+        return _load(directory)
+    except (OSError, ValueError, TypeError, KeyError, IndexError,
+            OverflowError, struct.error):
+        return None
+
+
+def _load(directory):
+    """Does the work of load, raising if the snapshot is malformed."""
+    with open(path_for(directory), "rb") as f:
+        header = _read_header(f, directory)
+        if header is None:
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(buffer)
+
+    def section(offset, size):
+        if not 0 <= offset <= offset + size <= len(view):
+            raise ValueError("snapshot section out of range")
+        return view[offset:offset + size]
+
+    arrays = {}
+    for name in ARRAYS:
+        offset, length = header["arrays"][name]
+        arrays[name] = section(offset, length * header["itemsize"]).cast(
+            TYPECODE)
+
+    names, people, movies, components, person_ids, movie_ids = json.loads(
+        bytes(section(*header["metadata"])))
+    names = {name: set(ids) for name, ids in names.items()}
+
+    # Check the arrays fit together, so no lookup can index out of range
+    for offsets, items, count, bound in (
+            ("person_offsets", "person_movies", len(person_ids), len(movie_ids)),
+            ("movie_offsets", "movie_people", len(movie_ids), len(person_ids))):
+        offsets, items = arrays[offsets], arrays[items]
+        if (len(offsets) != count + 1 or offsets[0] != 0
+                or offsets[-1] != len(items)
+                or len(items) and not 0 <= min(items) <= max(items) < bound):
+            raise ValueError("snapshot arrays do not match")
+
+    graph = Graph.from_arrays(person_ids, movie_ids, **arrays)
+    return names, people, movies, components, graph
@@ -0,0 +1,152 @@
+"""
+Bitboard Tic Tac Toe engine
+
+A position is a pair of 9-bit integers (x, o), one per player, where
+bit 3 * i + j is set if that player holds square (i, j). Converts to and
+from the list-of-lists boards of tictactoe.py, so `minimax` here can
+stand in for tictactoe.minimax.
+"""
+
+import math
+
+from tictactoe import X, O, EMPTY
+
+FULL = 0b111_111_111
+
+# Bit masks of the 8 winning lines: rows, columns, then diagonals
+WIN_MASKS = [
+    0b000_000_111, 0b000_111_000, 0b111_000_000,
+    0b001_001_001, 0b010_010_010, 0b100_100_100,
+    0b100_010_001, 0b001_010_100,
+]
+
+# WINS[bits] is True if `bits` contains a winning line
+WINS = [any(bits & mask == mask for mask in WIN_MASKS)
+        for bits in range(FULL + 1)]
+
+# Squares as bit indices in center, corners, edges order
+SQUARE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards of a list-of-lists board.
+    """
+    x, o = 0, 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board of (x, o) bitboards.
+    """
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return X if bin(x).count("1") <= bin(o).count("1") else O
+
+
+def actions(x, o):
+    """
+    Returns the bit indices of the empty squares, in SQUARE_ORDER.
+    """
+    occupied = x | o
+    return [square for square in SQUARE_ORDER if not occupied >> square & 1]
+
+
+def result(x, o, square):
+    """
+    Returns the (x, o) position after the current player takes `square`.
+    """
+    bit = 1 << square
+    if (x | o) & bit:
+        raise Exception("invalid action")
+    return (x | bit, o) if player(x, o) == X else (x, o | bit)
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINS[x]:
+        return X
+    if WINS[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the current player on a
+    list-of-lists board, searching on bitboards.
+    """
+    x, o = from_board(board)
+    if terminal(x, o):
+        return None
+
+    # Negamax: `mine` is the side to move, scores are from its view
+    mine, theirs = (x, o) if player(x, o) == X else (o, x)
+    alpha, best_square = -math.inf, None
+    for square in actions(mine, theirs):
+        score = -negamax(theirs, mine | 1 << square, -math.inf, -alpha)
+        if score > alpha:
+            alpha, best_square = score, square
+    return divmod(best_square, 3)
+
+
+def negamax(mine, theirs, alpha, beta):
+    """
+    Returns the score of the position for the side to move, which holds
+    `mine`, searched with alpha-beta pruning.
+    """
+    if WINS[theirs]:
+        return -1
+    occupied = mine | theirs
+    if occupied == FULL:
+        return 0
+
+    # An immediate win needs no further search
+    for mask in WIN_MASKS:
+        gap = mask & ~mine
+        if gap & (gap - 1) == 0 and not gap & theirs:
+            return 1
+
+    best = -math.inf
+    for square in SQUARE_ORDER:
+        bit = 1 << square
+        if occupied & bit:
+            continue
+        score = -negamax(theirs, mine | bit, -beta, -alpha)
+        if score > best:
+            best = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+    return best
@@ -0,0 +1,48 @@
+"""
+Writes the Tic Tac Toe opening book: the optimal action for every board
+reachable from the initial state, solved once by tictactoe.search.
+
+Usage: python book.py [path]
+"""
+
+import sys
+
+import tictactoe as ttt
+
+
+def generate():
+    """
+    Returns the book as bytes, indexed by tictactoe.board_index.
+    Boards that are unreachable or already over hold BOOK_NONE.
+    """
+    book = bytearray([ttt.BOOK_NONE]) * ttt.BOOK_SIZE
+    seen = set()
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        index = ttt.board_index(board)
+        if index in seen:
+            continue
+        seen.add(index)
+        if ttt.terminal(board):
+            continue
+        i, j = ttt.search(board)
+        book[index] = 3 * i + j
+        for action in ttt.actions(board):
+            stack.append(ttt.result(board, action))
+    return bytes(book)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_PATH
+    book = generate()
+    with open(path, "wb") as f:
+        f.write(book)
+    solved = sum(move != ttt.BOOK_NONE for move in book)
+    print(f"Wrote {solved} positions to {path}.")
+
+
+if __name__ == "__main__":
+    main()
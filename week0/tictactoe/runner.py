@@ -1,6 +1,8 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -18,13 +20,23 @@ largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
-board = ttt.Board()
-ai_turn = False
+board = ttt.initial_state()
+
+# The AI searches on a worker thread so the window keeps redrawing;
+# ai_move is the future of its pending move, if any, and setting
+# ai_cancel aborts that search
+executor = ThreadPoolExecutor(max_workers=1)
+ai_move = None
+ai_cancel = threading.Event()
+ai_started = 0
+clock = pygame.time.Clock()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            ai_cancel.set()
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
     screen.fill(black)
@@ -35,7 +47,7 @@ while True:
         # Draw title
         title = largeFont.render("Play Tic-Tac-Toe", True, white)
         titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)C
+        titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
 
         # Draw buttons
@@ -81,8 +93,8 @@ while True:
                 )
                 pygame.draw.rect(screen, white, rect, 3)
 
-                if board.state[i][j] != ttt.EMPTY:
-                    move = moveFont.render(board.state[i][j], True, white)
+                if board[i][j] != ttt.EMPTY:
+                    move = moveFont.render(board[i][j], True, white)
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
                     screen.blit(move, moveRect)
@@ -90,7 +102,7 @@ while True:
             tiles.append(row)
 
         game_over = ttt.terminal(board)
-        player = board.player
+        player = ttt.player(board)
 
         # Show title
         if game_over:
@@ -108,19 +120,19 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, started in the background and played once
+        # it is ready and has been shown thinking for at least 0.5s
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                print("Current board state before AI move:")
-                for row in board.state:
-                    print(row)
-                move = ttt.minimax(board)[0]
+            if ai_move is None:
+                ai_cancel = threading.Event()
+                ai_move = executor.submit(ttt.minimax, [row[:] for row in board],
+                                          cancel=ai_cancel)
+                ai_started = time.monotonic()
+            elif ai_move.done() and time.monotonic() - ai_started >= 0.5:
+                move = ai_move.result()
                 print(f"AI selected move: {move}")
                 board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -128,12 +140,15 @@ while True:
             mouse = pygame.mouse.get_pos()
             for i in range(3):
                 for j in range(3):
-                    if (board.state[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
+                    if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
+        # Offer a new game at any time; starting one aborts the AI's
+        # pending search
+        if game_over or user != player:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
+            again = mediumFont.render(
+                "Play Again" if game_over else "New Game", True, black)
             againRect = again.get_rect()
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
@@ -144,7 +159,10 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.Board()
-                    ai_turn = False
+                    board = ttt.initial_state()
+                    if ai_move is not None:
+                        ai_cancel.set()
+                        ai_move = None
 
     pygame.display.flip()
+    clock.tick(60)
@@ -0,0 +1,216 @@
+"""
+Headless self-play harness for the Tic Tac Toe engines
+
+Plays games between two engines through the tictactoe.py API and reports,
+per engine, the nodes searched, nodes per second and per-move latency
+percentiles, plus the game results.
+
+Usage: python selfplay.py X_ENGINE O_ENGINE [--games N] [--seed N]
+                          [--rows N] [--cols N] [-k N] [--budget SECONDS]
+
+Engines: minimax, alphabeta, transposition, bitboard, book, deepening,
+random. All but deepening and random only play 3x3 boards with k = 3.
+"""
+
+import argparse
+import contextlib
+import math
+import random
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+class NodeCounter():
+    """Counts the positions an engine visits during one move."""
+
+    def __init__(self):
+        self.nodes = 0
+
+    @contextlib.contextmanager
+    def counting(self, module, name):
+        """
+        Wraps the recursive search function `module.name` for the duration
+        of the block so every call, including the recursive ones made
+        through the module global, counts one node.
+        """
+        function = getattr(module, name)
+
+        def counted(*args, **kwargs):
+            self.nodes += 1
+            return function(*args, **kwargs)
+
+        setattr(module, name, counted)
+        try:
+            yield
+        finally:
+            setattr(module, name, function)
+
+
+def plain_minimax(board, counter):
+    """
+    Returns the optimal action by full minimax without pruning or
+    caching, as the baseline the other engines are measured against.
+    """
+    def h(board):
+        counter.nodes += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        scores = [h(ttt.result(board, action)) for action in ttt.actions(board)]
+        return max(scores) if ttt.player(board) == ttt.X else min(scores)
+
+    pick = max if ttt.player(board) == ttt.X else min
+    return pick(sorted(ttt.actions(board)),
+                key=lambda action: h(ttt.result(board, action)))
+
+
+def plain_alphabeta(board, counter):
+    """
+    Returns the optimal action by alpha-beta search in `ordered_actions`
+    order, with no transposition table, to measure pruning on its own.
+    """
+    def h(board, alpha, beta):
+        counter.nodes += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        maximizing = ttt.player(board) == ttt.X
+        best = -math.inf if maximizing else math.inf
+        for action in ttt.ordered_actions(board):
+            score = h(ttt.result(board, action), alpha, beta)
+            if maximizing:
+                best = max(best, score)
+                alpha = max(alpha, best)
+            else:
+                best = min(best, score)
+                beta = min(beta, best)
+            if alpha >= beta:
+                break
+        return best
+
+    maximizing = ttt.player(board) == ttt.X
+    alpha, beta = -math.inf, math.inf
+    best_move = None
+    for action in ttt.ordered_actions(board):
+        score = h(ttt.result(board, action), alpha, beta)
+        if maximizing and score > alpha:
+            alpha, best_move = score, action
+        elif not maximizing and score < beta:
+            beta, best_move = score, action
+    return best_move
+
+
+def make_engines(k, budget, rng):
+    """
+    Returns a dict mapping engine names to functions of (board, counter)
+    that return the engine's action.
+    """
+    def transposition(board, counter):
+        with counter.counting(ttt, "value"):
+            return ttt.search(board)
+
+    def with_bitboard(board, counter):
+        with counter.counting(bitboard, "negamax"):
+            return bitboard.minimax(board)
+
+    def book(board, counter):
+        if ttt.opening_book() is None:
+            raise SystemExit("No opening book; run book.py first.")
+        return ttt.minimax(board)
+
+    def deepening(board, counter):
+        with counter.counting(ttt, "_alphabeta"):
+            return ttt.deepening_search(board, k, budget)
+
+    def random_move(board, counter):
+        return rng.choice(sorted(ttt.actions(board)))
+
+    return {
+        "minimax": plain_minimax,
+        "alphabeta": plain_alphabeta,
+        "transposition": transposition,
+        "bitboard": with_bitboard,
+        "book": book,
+        "deepening": deepening,
+        "random": random_move,
+    }
+
+
+def play(engines, rows, cols, k):
+    """
+    Plays one game between engines (x, o) and returns the winner (or
+    None) and, per player, a list of (seconds, nodes) for each move.
+    """
+    board = ttt.initial_state(rows, cols)
+    moves = {ttt.X: [], ttt.O: []}
+    while not ttt.terminal(board, k):
+        mark = ttt.player(board)
+        counter = NodeCounter()
+        start = time.perf_counter()
+        action = engines[mark](board, counter)
+        moves[mark].append((time.perf_counter() - start, counter.nodes))
+        board = ttt.result(board, action)
+    return ttt.winner(board, k), moves
+
+
+def percentile(samples, q):
+    """Returns the `q` quantile of sorted `samples` by nearest rank."""
+    return samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)]
+
+
+def report(name, mark, moves):
+    """Prints the search statistics of one side."""
+    if not moves:
+        print(f"{mark} ({name}): no moves")
+        return
+    seconds = sorted(seconds for seconds, _ in moves)
+    total_time = sum(seconds)
+    nodes = sum(nodes for _, nodes in moves)
+    rate = nodes / total_time if total_time else 0
+    print(f"{mark} ({name}): {len(moves)} moves, {nodes} nodes, "
+          f"{rate:,.0f} nodes/s")
+    print("    latency " + "  ".join(
+        f"p{int(q * 100)} {1000 * percentile(seconds, q):.3f}ms"
+        for q in (0.5, 0.9, 0.99)) + f"  max {1000 * seconds[-1]:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Tic Tac Toe engines against each other.")
+    parser.add_argument("x_engine")
+    parser.add_argument("o_engine")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=ttt.DEFAULT_BUDGET,
+                        help="seconds per move for the deepening engine")
+    args = parser.parse_args()
+
+    engines = make_engines(args.k, args.budget, random.Random(args.seed))
+    for name in (args.x_engine, args.o_engine):
+        if name not in engines:
+            parser.error(f"unknown engine {name!r}, "
+                         f"choose from {', '.join(engines)}")
+        classic = (args.rows, args.cols, args.k) == (3, 3, 3)
+        if not classic and name not in ("deepening", "random"):
+            parser.error(f"{name} only plays 3x3 boards with k = 3")
+
+    players = {ttt.X: engines[args.x_engine], ttt.O: engines[args.o_engine]}
+    results = {ttt.X: 0, ttt.O: 0, None: 0}
+    moves = {ttt.X: [], ttt.O: []}
+    for _ in range(args.games):
+        winner, game_moves = play(players, args.rows, args.cols, args.k)
+        results[winner] += 1
+        for mark in moves:
+            moves[mark] += game_moves[mark]
+
+    print(f"{args.games} games: X wins {results[ttt.X]}, "
+          f"O wins {results[ttt.O]}, draws {results[None]}")
+    report(args.x_engine, ttt.X, moves[ttt.X])
+    report(args.o_engine, ttt.O, moves[ttt.O])
+
+
+if __name__ == "__main__":
+    main()
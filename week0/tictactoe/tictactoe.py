@@ -2,21 +2,29 @@
 Tic Tac Toe Player
 """
 
+import functools
 import math
+import multiprocessing
+import os
+import time
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Opening book of optimal moves for every board, written by book.py
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_SIZE = 3 ** 9
+BOOK_NONE = 255
+_book = False
 
 
-def initial_state():
+
+def initial_state(rows=3, cols=3):
     """
-    Returns starting state of the board.
+    Returns starting state of the board, `rows` by `cols` squares.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
 
 
 def player(board):
@@ -41,8 +49,8 @@ def actions(board):
     Returns set of all possible actions (i, j) available on the board.
     """
     actions = set()
-    for i in range(3):
-        for j in range(3):
+    for i in range(len(board)):
+        for j in range(len(board[i])):
             if board[i][j] == EMPTY:
                 actions.add((i, j))
     return actions            
@@ -52,7 +60,8 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    if not 0 <= action[0] <= 3 or not 0 <= action[1] <= 3:
+    if (not 0 <= action[0] < len(board)
+            or not 0 <= action[1] < len(board[0])):
         raise Exception("invalid action argument on result function")
     state = [row[:] for row in board]
     opponent = player(board)
@@ -61,66 +70,529 @@ def result(board, action):
     state[action[0]][action[1]] = opponent
     return state
 
-def winner(state):
-    """
-    Returns the winner of the game, if there is one.
-    """
-    # the vertical/ horizontal check
-    for i in range(3):
-        if state[i][0] == state[i][1] == state[i][2] and state[i][0]:
-            return state[i][0]
-        if state[0][i] == state[1][i] == state[2][i] and state[0][i]:
-            return state[0][i]
-    # the diagonal check
-    if state[0][0] == state[1][1] == state[2][2] and state[1][1]:
-        return state[1][1]
-    if state[0][2] == state[1][1] == state[2][0] and state[1][1]:
-        return state[1][1]
+
+# Steps along a row, a column and the two diagonals
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+def winner(state, k=3):
+    """
+    Returns the winner of the game, if there is one: the player with
+    `k` marks in a row, column or diagonal.
+    """
+    for i in range(len(state)):
+        for j in range(len(state[i])):
+            if state[i][j] and wins_at(state, (i, j), k):
+                return state[i][j]
     return None
 
 
-def terminal(board):
+def wins_at(state, action, k=3):
+    """
+    Returns True if the mark on square `action` is part of a run of
+    at least `k` equal marks.
+    """
+    i, j = action
+    mark = state[i][j]
+    rows, cols = len(state), len(state[0])
+    for di, dj in DIRECTIONS:
+        run = 1
+        for sign in (1, -1):
+            r, c = i + sign * di, j + sign * dj
+            while 0 <= r < rows and 0 <= c < cols and state[r][c] == mark:
+                run += 1
+                r, c = r + sign * di, c + sign * dj
+        if run >= k:
+            return True
+    return False
+
+
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board):
+    if winner(board, k):
         return True
     return not any(EMPTY in row for row in board)
 
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
     # You may assume utility will only be called on a board if terminal(board) is True.
-    winner_player = winner(board)
+    winner_player = winner(board, k)
     return 0 if winner_player is None else (1 if winner_player == X else -1)
 
 
-def minimax(board):
+# Center, then corners, then edges: the order in which squares take
+# part in the most lines
+SQUARE_ORDER = [(1, 1),
+                (0, 0), (0, 2), (2, 0), (2, 2),
+                (0, 1), (1, 0), (1, 2), (2, 1)]
+
+
+def ordered_actions(board):
+    """
+    Returns the possible actions on the board as a list, most promising
+    first: winning moves, then moves blocking an opponent's win, then the
+    rest in SQUARE_ORDER.
+    """
+    current = player(board)
+    opponent = O if current == X else X
+    wins, blocks, rest = [], [], []
+    for action in SQUARE_ORDER:
+        if board[action[0]][action[1]] != EMPTY:
+            continue
+        if completes_line(board, action, current):
+            wins.append(action)
+        elif completes_line(board, action, opponent):
+            blocks.append(action)
+        else:
+            rest.append(action)
+    return wins + blocks + rest
+
+
+def completes_line(board, action, mark):
+    """
+    Returns True if `mark` playing at `action` would complete a line.
+    """
+    i, j = action
+    lines = [[(i, k) for k in range(3)], [(k, j) for k in range(3)]]
+    if i == j:
+        lines.append([(k, k) for k in range(3)])
+    if i + j == 2:
+        lines.append([(k, 2 - k) for k in range(3)])
+    return any(all(board[r][c] == mark for r, c in line if (r, c) != action)
+               for line in lines)
+
+
+# The 8 symmetries of the square (the dihedral group D4) as maps on
+# (i, j) squares
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+]
+
+# Kinds of score stored in the transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Maps canonical board keys to (score, kind), shared by every search
+# in this process
+transposition_table = {}
+
+
+def canonical_key(board):
+    """
+    Returns a string identifying the board up to rotation and
+    reflection: the smallest encoding over all 8 symmetric boards.
+    """
+    cells = [[board[i][j] or "." for j in range(3)] for i in range(3)]
+    return min(
+        "".join(cells[i][j]
+                for i, j in (symmetry(r, c) for r in range(3) for c in range(3)))
+        for symmetry in SYMMETRIES
+    )
+
+
+def minimax(board, k=3, budget=None, processes=None, cancel=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Classic 3x3 games with k = 3 are answered from the opening book when
+    book.bin (written by book.py) is present and holds the board, and by
+    `search` otherwise. Other boards and values of `k` are too large to
+    solve outright, so they get the best move `deepening_search` finds
+    within `budget` seconds (DEFAULT_BUDGET if None).
+
+    If `processes` is given, searches are split across that many
+    processes by `parallel_search` instead.
+
+    `cancel` is an optional threading.Event; setting it from another
+    thread aborts a single-process search with SearchCancelled.
+    """
+    if terminal(board, k):
+        return None
+    if len(board) != 3 or len(board[0]) != 3 or k != 3:
+        budget = DEFAULT_BUDGET if budget is None else budget
+        if processes is not None:
+            return parallel_search(board, k, budget, processes)
+        return deepening_search(board, k, budget, cancel)
+    book = opening_book()
+    if book is not None and book[board_index(board)] != BOOK_NONE:
+        return divmod(book[board_index(board)], 3)
+    if processes is not None:
+        return parallel_search(board, k, None, processes)
+    return search(board, cancel)
+
+
+def search(board, cancel=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Searches with alpha-beta pruning, trying moves in `ordered_actions`
+    order so that cutoffs come early, and caches every position's score
+    in `transposition_table` under its canonical key, so positions that
+    are equal up to symmetry are solved once per process.
+    """
+    if terminal(board):
+        return None
+
+    maximizing = player(board) == X
+    alpha, beta = -math.inf, math.inf
+    best_move = None
+    for action in ordered_actions(board):
+        score = value(result(board, action), alpha, beta, cancel)
+        if maximizing and score > alpha:
+            alpha, best_move = score, action
+        elif not maximizing and score < beta:
+            beta, best_move = score, action
+    return best_move
+
+
+def board_index(board):
+    """
+    Returns the board read as a base-3 number, with EMPTY, X and O as
+    the digits 0, 1 and 2, from square (0, 0) upwards.
+    """
+    index = 0
+    for i in reversed(range(3)):
+        for j in reversed(range(3)):
+            index = 3 * index + (1 if board[i][j] == X else
+                                 2 if board[i][j] == O else 0)
+    return index
+
+
+def opening_book():
+    """
+    Returns the contents of book.bin, loaded on first use: one byte per
+    `board_index` holding the square 3 * i + j of the optimal action, or
+    BOOK_NONE. Returns None if there is no valid book.
+    """
+    global _book
+    if _book is False:
+        try:
+            with open(BOOK_PATH, "rb") as f:
+                _book = f.read()
+        except FileNotFoundError:
+            _book = None
+        if _book is not None and len(_book) != BOOK_SIZE:
+            _book = None
+    return _book
+
+
+def value(board, alpha=-math.inf, beta=math.inf, cancel=None):
+    """
+    Returns the minimax score of the board if it lies strictly between
+    alpha and beta; otherwise a bound on it beyond that side.
+
+    Raises SearchCancelled once the `cancel` event, if any, is set.
+    """
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled()
+    if terminal(board):
+        return utility(board)
+
+    key = canonical_key(board)
+    if key in transposition_table:
+        score, kind = transposition_table[key]
+        if kind == EXACT:
+            return score
+        if kind == LOWER:
+            alpha = max(alpha, score)
+        else:
+            beta = min(beta, score)
+        if alpha >= beta:
+            return score
+
+    original_alpha, original_beta = alpha, beta
+    if player(board) == X:
+        best_score = -math.inf
+        for action in ordered_actions(board):
+            best_score = max(best_score, value(result(board, action), alpha, beta,
+                                               cancel))
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                break
+    else:
+        best_score = math.inf
+        for action in ordered_actions(board):
+            best_score = min(best_score, value(result(board, action), alpha, beta,
+                                               cancel))
+            beta = min(beta, best_score)
+            if alpha >= beta:
+                break
+
+    if best_score <= original_alpha:
+        transposition_table[key] = (best_score, UPPER)
+    elif best_score >= original_beta:
+        transposition_table[key] = (best_score, LOWER)
+    else:
+        transposition_table[key] = (best_score, EXACT)
+    return best_score
+
+
+# Seconds deepening_search spends on a move unless told otherwise
+DEFAULT_BUDGET = 1.0
+
+# Score of a won position, beyond any heuristic evaluation
+WIN_SCORE = 10 ** 12
+
+
+class SearchTimeout(Exception):
+    """Raised inside a deepening search when its budget runs out."""
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search when its cancel event is set."""
+
+
+def deepening_search(board, k, budget, cancel=None):
     """
-    Returns the optimal [board, score] for the current player on the board.
+    Returns the best action for the current player on an m x n board
+    with a k-in-a-row win rule, found by iterative-deepening alpha-beta
+    search within `budget` seconds.
+
+    Each completed depth's best move is searched first at the next depth.
+    The move from the deepest completed search is returned; if even
+    depth 1 does not finish, the most central candidate move is.
+    Setting the `cancel` event, if any, raises SearchCancelled.
     """
-    def h(board):
-        if terminal(board):
-            return (None, utility(board))
-        
-        if player(board) == X:
+    deadline = time.monotonic() + budget
+    board = [row[:] for row in board]
+    mark = player(board)
+    moves = candidate_actions(board)
+    best_move = moves[0]
+    empty = sum(row.count(EMPTY) for row in board)
+
+    for depth in range(1, empty + 1):
+        try:
+            score, move = _search_root(board, k, depth, mark, moves,
+                                       deadline, cancel)
+        except SearchTimeout:
+            break
+        best_move = move
+        moves.remove(move)
+        moves.insert(0, move)
+        # A forced win or loss was found, deeper search won't change it
+        if abs(score) >= WIN_SCORE:
+            break
+    return best_move
+
+
+def _search_root(board, k, depth, mark, moves, deadline, cancel=None):
+    """Returns the (score, move) of the best of `moves` at `depth`."""
+    maximizing = mark == X
+    alpha, beta = -math.inf, math.inf
+    best_move = moves[0]
+    for move in moves:
+        score = _alphabeta(board, k, depth - 1, mark, move,
+                           alpha, beta, deadline, cancel)
+        if maximizing and score > alpha:
+            alpha, best_move = score, move
+        elif not maximizing and score < beta:
+            beta, best_move = score, move
+    return (alpha if maximizing else beta), best_move
+
+
+def _alphabeta(board, k, depth, mark, move, alpha, beta, deadline,
+               cancel=None):
+    """
+    Plays `mark` at `move` in place, returns the alpha-beta score of the
+    resulting position searched `depth` more plies, and undoes the move.
+    """
+    if time.monotonic() > deadline:
+        raise SearchTimeout()
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled()
+
+    i, j = move
+    board[i][j] = mark
+    try:
+        if wins_at(board, move, k):
+            # Prefer quicker wins and slower losses
+            return (WIN_SCORE + depth) * (1 if mark == X else -1)
+        moves = candidate_actions(board)
+        if not moves:
+            return 0
+        if depth == 0:
+            return evaluate(board, k)
+
+        opponent = O if mark == X else X
+        if opponent == X:
             best_score = -math.inf
-            best_move = None
-            for action in actions(board):
-                _, score = h(result(board, action))
-                if score > best_score:
-                    best_score = score
-                    best_move = action
-            return (best_move, best_score)
+            for action in moves:
+                best_score = max(best_score, _alphabeta(
+                    board, k, depth - 1, opponent, action, alpha, beta, deadline,
+                    cancel))
+                alpha = max(alpha, best_score)
+                if alpha >= beta:
+                    break
         else:
             best_score = math.inf
-            best_move = None
-            for action in actions(board):
-                _, score = h(result(board, action))
-                if score < best_score:
-                    best_score = score
-                    best_move = action
-            return (best_move, best_score)
-    return h(board)[0]
+            for action in moves:
+                best_score = min(best_score, _alphabeta(
+                    board, k, depth - 1, opponent, action, alpha, beta, deadline,
+                    cancel))
+                beta = min(beta, best_score)
+                if alpha >= beta:
+                    break
+        return best_score
+    finally:
+        board[i][j] = EMPTY
+
+
+def candidate_actions(board):
+    """
+    Returns the empty squares next to a mark (every empty square would
+    be too many on large boards), most central first. On an empty board
+    only the center is returned.
+    """
+    rows, cols = len(board), len(board[0])
+    candidates = set()
+    marked = False
+    for i in range(rows):
+        for j in range(cols):
+            if board[i][j] == EMPTY:
+                continue
+            marked = True
+            for r in range(max(0, i - 1), min(rows, i + 2)):
+                for c in range(max(0, j - 1), min(cols, j + 2)):
+                    if board[r][c] == EMPTY:
+                        candidates.add((r, c))
+    if not marked:
+        return [((rows - 1) // 2, (cols - 1) // 2)]
+    return sorted(candidates, key=lambda action: (
+        abs(2 * action[0] - rows + 1) + abs(2 * action[1] - cols + 1), action))
+
+
+@functools.lru_cache(maxsize=None)
+def lines(rows, cols, k):
+    """Returns every run of k squares in a row, column or diagonal."""
+    runs = []
+    for i in range(rows):
+        for j in range(cols):
+            for di, dj in DIRECTIONS:
+                end_i, end_j = i + (k - 1) * di, j + (k - 1) * dj
+                if 0 <= end_i < rows and 0 <= end_j < cols:
+                    runs.append(tuple((i + s * di, j + s * dj)
+                                      for s in range(k)))
+    return runs
+
+
+def evaluate(board, k):
+    """
+    Returns a heuristic score of a non-terminal board, positive when
+    good for X: each run of k squares holding marks of only one player
+    counts 10 ** (number of marks) for that player.
+    """
+    score = 0
+    for line in lines(len(board), len(board[0]), k):
+        xs = os_ = 0
+        for i, j in line:
+            if board[i][j] == X:
+                xs += 1
+            elif board[i][j] == O:
+                os_ += 1
+        if xs and not os_:
+            score += 10 ** xs
+        elif os_ and not xs:
+            score -= 10 ** os_
+    return score
+
+
+# (bound, best) shared values of the parallel search this worker serves
+_shared = None
+
+
+def _init_worker(bound, best):
+    global _shared
+    _shared = (bound, best)
+
+
+def parallel_search(board, k=3, budget=None, processes=None):
+    """
+    Returns the best action for the current player, with the root moves
+    split across a pool of `processes` worker processes (default: one
+    per CPU).
+
+    Workers share the best root score found so far (from the mover's
+    point of view) and the index of its move, and each starts its
+    alpha-beta window from that bound, so moves searched later are cut
+    off by the best found on any core.
+
+    With `budget` None the board is solved exactly by `value`, which
+    suits 3x3 boards. Otherwise iterative deepening runs as in
+    `deepening_search`, one parallel pass per depth, until the budget
+    in seconds runs out.
+    """
+    if terminal(board, k):
+        return None
+    mark = player(board)
+    bound = multiprocessing.Value("d", -math.inf)
+    best = multiprocessing.Value("i", -1)
+
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(bound, best)) as pool:
+        if budget is None:
+            moves = sorted(actions(board))
+            tasks = [(board, k, None, mark, index, move, math.inf)
+                     for index, move in enumerate(moves)]
+            pool.map(_search_move, tasks)
+            return moves[best.value]
+
+        deadline = time.monotonic() + budget
+        moves = candidate_actions(board)
+        best_move = moves[0]
+        empty = sum(row.count(EMPTY) for row in board)
+        for depth in range(1, empty + 1):
+            bound.value = -math.inf
+            best.value = -1
+            tasks = [(board, k, depth, mark, index, move, deadline)
+                     for index, move in enumerate(moves)]
+            if not all(pool.map(_search_move, tasks)):
+                break
+            best_move = moves[best.value]
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+            if abs(bound.value) >= WIN_SCORE:
+                break
+    return best_move
+
+
+def _search_move(task):
+    """
+    Pool task: scores one root move against the shared bound, and makes
+    it the shared best if it beats it. Returns False if the deadline
+    passed first.
+    """
+    board, k, depth, mark, index, move, deadline = task
+    bound, best = _shared
+    sign = 1 if mark == X else -1
+
+    # Scores are from X's point of view, the shared bound from the mover's
+    with bound.get_lock():
+        seen = bound.value
+    alpha, beta = (seen, math.inf) if mark == X else (-math.inf, -seen)
+    try:
+        if depth is None:
+            score = value(result(board, move), alpha, beta)
+        else:
+            score = _alphabeta([row[:] for row in board], k, depth - 1, mark,
+                               move, alpha, beta, deadline)
+    except SearchTimeout:
+        return False
+
+    # A score not beating the bound seen is only a bound itself, so it
+    # can never become the best
+    with bound.get_lock():
+        if sign * score > bound.value:
+            bound.value = sign * score
+            best.value = index
+    return True
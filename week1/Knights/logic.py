@@ -1,7 +1,37 @@
+import heapq
 import itertools
+import multiprocessing
+import os
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Interned sentences by the keys of Sentence.interned, held weakly so
+# unused sentences are still freed
+_interned = weakref.WeakValueDictionary()
 
 
 class Sentence():
+    """
+    Sentences are immutable, and cache their hash and symbols when built.
+    Every kind but And is interned, so building a sentence equal to an
+    existing one returns the existing node.
+    """
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __reduce__(self):
+        return (type(self), self.operands())
+
+    def operands(self):
+        """Returns the constructor arguments of the sentence."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,13 +43,66 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self._symbols)
+
+    def expression(self, index):
+        """
+        Returns Python source evaluating the sentence over an int `m`
+        whose bit index[name] holds the value of each symbol.
+        """
+        raise Exception("nothing to compile")
+
+    def truth_table(self, index, models):
+        """
+        Returns a boolean array of the sentence's value in each model of
+        the int array `models`, with symbols as bits as in expression().
+        """
+        raise Exception("nothing to evaluate")
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def nest(cls, sentence):
+        """
+        Validates an operand of a new sentence and freezes it, since the
+        new sentence caches a hash and symbols derived from it.
+        """
+        cls.validate(sentence)
+        if isinstance(sentence, And):
+            object.__setattr__(sentence, "_frozen", True)
+
+    @classmethod
+    def key(cls, part):
+        """
+        Returns part of a sentence's structure as it appears in interning
+        keys. A fresh And is keyed by identity, so that share() never
+        reuses a node holding one.
+        """
+        if isinstance(part, And) and not part._shared:
+            return ("fresh", id(part))
+        return part
+
+    @classmethod
+    def interned(cls, structure, symbols, **fields):
+        """
+        Returns the node of this class for `structure`, a tuple of a tag
+        and the operands, building it with attributes `fields` if no
+        equal sentence exists yet.
+        """
+        key = tuple(Sentence.key(part) for part in structure)
+        sentence = _interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(structure))
+            object.__setattr__(sentence, "_symbols", symbols)
+            _interned[key] = sentence
+        return sentence
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -43,15 +126,20 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.interned(("symbol", name), frozenset([name]), name=name)
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name)
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
+
+    def operands(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -65,20 +153,30 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def expression(self, index):
+        return f"(m >> {index[self.name]} & 1)"
+
+    def truth_table(self, index, models):
+        return (models >> index[self.name] & 1).astype(bool)
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        Sentence.nest(operand)
+        return cls.interned(("not", operand), operand._symbols,
+                            operand=operand)
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand)
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
+
+    def operands(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +187,43 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
+
+    def truth_table(self, index, models):
+        return ~self.operand.truth_table(index, models)
 
 
 class And(Sentence):
+    """
+    Unlike the other sentences, an And is a fresh node that can still be
+    extended with add(), until it becomes an operand of another sentence.
+    share() gives frozen, interned And nodes instead.
+    """
+    __slots__ = ("conjuncts", "_frozen", "_shared")
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+            Sentence.nest(conjunct)
+        object.__setattr__(self, "conjuncts", list(conjuncts))
+        object.__setattr__(self, "_frozen", False)
+        object.__setattr__(self, "_shared", False)
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_symbols", frozenset().union(
+            *[conjunct._symbols for conjunct in conjuncts]))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts)
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            object.__setattr__(
+                self, "_hash", hash(("and", *self.conjuncts)))
+        return self._hash
+
+    def operands(self):
+        return tuple(self.conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +232,13 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
+        if self._frozen:
+            raise Exception("cannot add to a sentence inside another sentence")
+        Sentence.nest(conjunct)
         self.conjuncts.append(conjunct)
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(
+            self, "_symbols", self._symbols | conjunct._symbols)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +249,39 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def expression(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.expression(index) for conjunct in self.conjuncts) + ")"
+
+    def truth_table(self, index, models):
+        table = np.ones(len(models), dtype=bool)
+        for conjunct in self.conjuncts:
+            table &= conjunct.truth_table(index, models)
+        return table
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+            Sentence.nest(disjunct)
+        return cls.interned(
+            ("or", *disjuncts),
+            frozenset().union(*[disjunct._symbols for disjunct in disjuncts]),
+            disjuncts=disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts)
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
+
+    def operands(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,24 +296,41 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.expression(index) for disjunct in self.disjuncts) + ")"
+
+    def truth_table(self, index, models):
+        table = np.zeros(len(models), dtype=bool)
+        for disjunct in self.disjuncts:
+            table |= disjunct.truth_table(index, models)
+        return table
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
+        Sentence.nest(antecedent)
+        Sentence.nest(consequent)
+        return cls.interned(
+            ("implies", antecedent, consequent),
+            antecedent._symbols | consequent._symbols,
+            antecedent=antecedent, consequent=consequent)
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
+
+    def operands(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +344,36 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, index):
+        return (f"(not {self.antecedent.expression(index)}"
+                f" or {self.consequent.expression(index)})")
+
+    def truth_table(self, index, models):
+        return (~self.antecedent.truth_table(index, models)
+                | self.consequent.truth_table(index, models))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
+        Sentence.nest(left)
+        Sentence.nest(right)
+        return cls.interned(
+            ("biconditional", left, right), left._symbols | right._symbols,
+            left=left, right=right)
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
+
+    def operands(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,12 +389,84 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def expression(self, index):
+        return (f"((not {self.left.expression(index)})"
+                f" == (not {self.right.expression(index)}))")
+
+    def truth_table(self, index, models):
+        return (self.left.truth_table(index, models)
+                == self.right.truth_table(index, models))
+
+
+# Above this many symbols model_check solves with SAT instead of
+# enumerating all 2^n models
+SAT_THRESHOLD = 16
+
+# Models per truth table chunk in the "numpy" method, which bounds its
+# memory to a few arrays of this many booleans at a time
+TABLE_CHUNK = 1 << 20
+
+# Models a "parallel" worker checks between looks at the shared flag
+FLAG_INTERVAL = 1 << 12
+
+
+def share(sentence):
+    """
+    Returns a sentence equal to `sentence` built only from interned
+    nodes, so a repeated sub-formula, even an And, is stored once.
+    The And nodes returned are frozen and cannot be added to.
+    """
+    shared = {}
+
+    def build(sentence):
+        if id(sentence) not in shared:
+            operands = [build(operand) if isinstance(operand, Sentence)
+                        else operand for operand in sentence.operands()]
+            if isinstance(sentence, And):
+                for operand in operands:
+                    Sentence.nest(operand)
+                shared[id(sentence)] = And.interned(
+                    ("and", *operands), sentence._symbols,
+                    conjuncts=operands, _frozen=True, _shared=True)
+            else:
+                shared[id(sentence)] = type(sentence)(*operands)
+        return shared[id(sentence)]
+
+    return build(sentence)
+
+
+def model_check(knowledge, query, method=None, processes=None):
+    """
+    Checks if knowledge base entails query.
+
+    `method` picks the algorithm: "enumerate" checks every model,
+    "numpy" checks every model as truth table arrays (requires numpy),
+    "parallel" checks every model across `processes` worker processes,
+    "sat" asks the DPLL solver whether knowledge ∧ ¬query is
+    unsatisfiable. By default small problems are enumerated and ones
+    with more than SAT_THRESHOLD symbols go to the solver.
+    """
+    # Get all symbols in both knowledge and query
+    symbols = knowledge._symbols | query._symbols
+
+    if method is None:
+        method = "sat" if len(symbols) > SAT_THRESHOLD else "enumerate"
+    if method == "sat":
+        return sat_entails(knowledge, query)
+    if method == "numpy":
+        return table_entails(knowledge, query, sorted(symbols))
+    if method == "parallel":
+        return parallel_entails(knowledge, query, sorted(symbols),
+                                processes=processes)
+    if method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
+
+    # Compile both sentences to functions of a bitmask model, with
+    # symbol i as bit i
+    names = sorted(symbols)
+    index = {name: i for i, name in enumerate(names)}
+    knowledge = compile_sentence(knowledge, index)
+    query = compile_sentence(query, index)
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -235,29 +475,490 @@ def model_check(knowledge, query):
         if not symbols:
 
             # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+            if knowledge(model):
+                return bool(query(model))
             return True
         else:
 
             # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+            p = symbols - 1
 
             # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+            model_true = model | 1 << p
 
             # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+            model_false = model
 
             # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+            return (check_all(knowledge, query, p, model_true) and
+                    check_all(knowledge, query, p, model_false))
+
+    # Check that knowledge entails query, `symbols` now counting the
+    # symbols left to assign
+    return check_all(knowledge, query, len(names), 0)
+
+
+def model_counts(knowledge, queries, method="enumerate"):
+    """
+    Returns the number of models of knowledge, and a list with how many
+    of those models each query is true in, enumerating all models once
+    for every query. `method` is "enumerate" or "numpy", as in
+    model_check.
+    """
+    names = sorted(knowledge._symbols.union(
+        *[query._symbols for query in queries]))
+    index = {name: i for i, name in enumerate(names)}
+    total = 1 << len(names)
+    count = 0
+    counts = [0] * len(queries)
+
+    if method == "numpy":
+        if np is None:
+            raise ValueError("the numpy model checking method requires numpy")
+        for start in range(0, total, TABLE_CHUNK):
+            models = np.arange(start, min(start + TABLE_CHUNK, total),
+                               dtype=np.int64)
+            models = models[knowledge.truth_table(index, models)]
+            count += len(models)
+            for i, query in enumerate(queries):
+                counts[i] += int(np.count_nonzero(
+                    query.truth_table(index, models)))
+        return count, counts
+    if method != "enumerate":
+        raise ValueError(f"unknown model counting method {method}")
+
+    knowledge = compile_sentence(knowledge, index)
+    queries = [compile_sentence(query, index) for query in queries]
+    for model in range(total):
+        if knowledge(model):
+            count += 1
+            for i, query in enumerate(queries):
+                if query(model):
+                    counts[i] += 1
+    return count, counts
+
+
+def entailed(knowledge, queries, method=None):
+    """
+    Returns the set of queries that knowledge entails, answering them
+    all from one enumeration of the models of knowledge. `method` is as
+    in model_check; "sat" solves for each query separately.
+    """
+    queries = list(queries)
+    symbols = knowledge._symbols.union(
+        *[query._symbols for query in queries])
+    if method is None:
+        method = "sat" if len(symbols) > SAT_THRESHOLD else "enumerate"
+    if method == "sat":
+        return {query for query in queries if sat_entails(knowledge, query)}
+    count, counts = model_counts(knowledge, queries, method)
+    return {query for query, n in zip(queries, counts) if n == count}
+
+
+def compile_sentence(sentence, index):
+    """
+    Returns a function of an int model `m` that evaluates the sentence
+    truthily, where bit index[name] of `m` is the value of each symbol.
+    """
+    try:
+        return eval(f"lambda m: {sentence.expression(index)}")
+    except (SyntaxError, MemoryError, RecursionError):
+        # Too deeply nested for the parser, so evaluate the tree instead
+        return lambda m: sentence.evaluate(
+            {name: m >> bit & 1 for name, bit in index.items()})
+
+
+def table_entails(knowledge, query, names):
+    """
+    Checks if knowledge entails query by evaluating both over all
+    2^n models of `names` as numpy arrays, TABLE_CHUNK models at a time.
+    """
+    if np is None:
+        raise ValueError("the numpy model checking method requires numpy")
+    index = {name: i for i, name in enumerate(names)}
+    total = 1 << len(names)
+    for start in range(0, total, TABLE_CHUNK):
+        models = np.arange(start, min(start + TABLE_CHUNK, total),
+                           dtype=np.int64)
+        if not np.all(~knowledge.truth_table(index, models)
+                      | query.truth_table(index, models)):
+            return False
+    return True
+
+
+# Flag the workers of parallel_entails set on finding a counter-model
+_found = None
+
+
+def _init_worker(found):
+    global _found
+    _found = found
+
+
+def parallel_entails(knowledge, query, names, split=None, processes=None):
+    """
+    Checks if knowledge entails query by enumerating the models of
+    `names` across a pool of `processes` worker processes (default: one
+    per CPU).
+
+    `split` of the symbols are fixed to each of their 2^split values,
+    one pool task each (default: enough for about four tasks per
+    worker), and each task enumerates the remaining symbols. A worker
+    that finds a model of knowledge where query is false sets a shared
+    flag, which stops the other workers, and the pool is then
+    terminated before it starts any more tasks.
+    """
+    processes = processes or os.cpu_count()
+    if split is None:
+        split = min(len(names), (4 * processes - 1).bit_length())
+    found = multiprocessing.Value("b", False)
+
+    with multiprocessing.Pool(processes, initializer=_init_worker,
+                              initargs=(found,)) as pool:
+        tasks = [(knowledge, query, names, split, prefix)
+                 for prefix in range(1 << split)]
+        for holds in pool.imap_unordered(_check_prefix, tasks):
+            if not holds:
+                return False
+    return True
+
+
+def _check_prefix(task):
+    """
+    Pool task: checks the models whose fixed symbols take the values in
+    the bits of `prefix`. Returns False if it finds a counter-model, and
+    True otherwise, including when it stops because another worker has.
+    """
+    knowledge, query, names, split, prefix = task
+    index = {name: i for i, name in enumerate(names)}
+    knowledge = compile_sentence(knowledge, index)
+    query = compile_sentence(query, index)
+
+    # The fixed symbols are the highest bits of the model
+    first = prefix << (len(names) - split)
+    last = first + (1 << (len(names) - split))
+    for start in range(first, last, FLAG_INTERVAL):
+        if _found.value:
+            return True
+        for model in range(start, min(start + FLAG_INTERVAL, last)):
+            if knowledge(model) and not query(model):
+                _found.value = True
+                return False
+    return True
+
+
+def sat_entails(knowledge, query):
+    """
+    Checks if knowledge base entails query by showing that
+    knowledge ∧ ¬query has no model.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+
+    # Assert ¬query as a clause, rather than building Not(query), which
+    # would freeze an And query against later add()s
+    cnf.clauses.append([-cnf.literal(query)])
+    return Solver(cnf.clauses, len(cnf.variables)).solve() is None
+
+
+class CNF():
+    """
+    Clauses in conjunctive normal form, built from sentences by the
+    Tseitin transformation: every compound subsentence gets a fresh
+    variable defined by a few clauses, so the clauses grow linearly
+    with the sentence and are satisfiable exactly when it is.
+
+    Variables are numbered from 1 and a clause is a list of literals,
+    +v for the variable and -v for its negation.
+    """
+
+    def __init__(self):
+        # Maps symbol names, and compound sentences, to their variables
+        self.variables = {}
+        self.definitions = {}
+        self.clauses = []
+
+    def add(self, sentence):
+        """Asserts that the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def variable(self, name):
+        """Returns the variable of the named symbol."""
+        if name not in self.variables:
+            self.variables[name] = len(self.variables) + 1
+        return self.variables[name]
+
+    def fresh(self):
+        """Returns a new auxiliary variable."""
+        t = len(self.variables) + 1
+        self.variables[("tseitin", t)] = t
+        return t
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        # A fresh variable t, with clauses making t <=> sentence
+        if isinstance(sentence, And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            t = self.fresh()
+            self.clauses.extend([-t, part] for part in parts)
+            self.clauses.append([t] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            t = self.fresh()
+            self.clauses.extend([t, -part] for part in parts)
+            self.clauses.append([-t] + parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            t = self.fresh()
+            self.clauses.extend([[-t, -a, b], [t, a], [t, -b]])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            t = self.fresh()
+            self.clauses.extend([[-t, -a, b], [-t, a, -b],
+                                 [t, a, b], [t, -a, -b]])
+        else:
+            raise TypeError(f"cannot convert {sentence!r} to CNF")
+        self.definitions[sentence] = t
+        return t
+
+
+# Activity past which the solver scales every activity down, as MiniSat
+# does, before the growing bump overflows
+RESCALE_LIMIT = 1e100
+
+
+class Solver():
+    """
+    CDCL (conflict-driven clause learning) SAT solver: DPLL search with
+    unit propagation over two watched literals per clause, first-UIP
+    clause learning with non-chronological backjumping, and decisions
+    by variable activity.
+
+    Unassigned variables wait in `order`, a heap of (-activity, variable)
+    entries. Entries are not updated in place: a bump pushes a new one,
+    and decide() skips those whose activity is out of date.
+    """
+
+    def __init__(self, clauses, num_variables):
+        self.num_variables = num_variables
+        self.value = [None] * (num_variables + 1)
+        self.level = [0] * (num_variables + 1)
+        self.reason = [None] * (num_variables + 1)
+        self.activity = [0.0] * (num_variables + 1)
+        self.increment = 1.0
+        self.order = [(-0.0, variable)
+                      for variable in range(1, num_variables + 1)]
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.watches = {}
+        self.clauses = []
+        self.conflict = False
+
+        for clause in clauses:
+            clause = list(dict.fromkeys(clause))
+            if any(-literal in clause for literal in clause):
+                continue
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """Adds a clause at decision level 0."""
+        if not clause:
+            self.conflict = True
+        elif len(clause) == 1:
+            if self.literal_value(clause[0]) is False:
+                self.conflict = True
+            elif self.literal_value(clause[0]) is None:
+                self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def literal_value(self, literal):
+        value = self.value[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.value[variable] = literal > 0
+        self.level[variable] = len(self.trail_limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses.
+        Returns a conflicting clause, or None.
+        """
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false_literal, [])
+            kept = []
+            for i, clause in enumerate(watching):
+                # Keep the false literal second
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.literal_value(clause[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for a new literal to watch
+                for j in range(2, len(clause)):
+                    if self.literal_value(clause[j]) is not False:
+                        clause[1], clause[j] = clause[j], clause[1]
+                        self.watches.setdefault(clause[1], []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.literal_value(clause[0]) is False:
+                        kept.extend(watching[i + 1:])
+                        self.watches[false_literal] = kept
+                        return clause
+                    self.assign(clause[0], clause)
+            self.watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, asserting
+        literal first, and the level to backjump to.
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learned = []
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        literal = None
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.level[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Walk back to the next literal of this level in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reason[abs(literal)]
+
+        learned.insert(0, -literal)
+        if len(learned) == 1:
+            return learned, 0
+        # Watch the literal of the highest remaining level second
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: self.level[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > RESCALE_LIMIT:
+            self.rescale()
+        elif len(self.order) > 8 * self.num_variables:
+            self.rebuild_order()
+        else:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def rescale(self):
+        """Scales all activities and the bump down by RESCALE_LIMIT."""
+        self.activity = [activity / RESCALE_LIMIT
+                         for activity in self.activity]
+        self.increment /= RESCALE_LIMIT
+        self.rebuild_order()
+
+    def rebuild_order(self):
+        """Rebuilds the heap of unassigned variables, dropping old entries."""
+        self.order = [(-self.activity[variable], variable)
+                      for variable in range(1, self.num_variables + 1)
+                      if self.value[variable] is None]
+        heapq.heapify(self.order)
+
+    def backjump(self, level):
+        """Undoes every assignment above decision level `level`."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.value[variable] = None
+            self.reason[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        while self.order:
+            activity, variable = heapq.heappop(self.order)
+            if (self.value[variable] is None
+                    and -activity == self.activity[variable]):
+                return variable
+        return None
+
+    def solve(self):
+        """
+        Returns a satisfying model as a list indexed by variable (index 0
+        unused), or None if the clauses are unsatisfiable.
+        """
+        if self.conflict:
+            return None
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    return None
+                learned, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                # Decay old activity by growing the bump
+                self.increment *= 1.05
+                if self.increment > RESCALE_LIMIT:
+                    self.rescale()
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                return list(self.value)
+            self.trail_limits.append(len(self.trail))
+            self.assign(-variable, None)